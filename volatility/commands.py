@@ -43,6 +43,8 @@ class Command(object):
         """
         self._config = config
         self._formatlist = []
+        self._formatters = []
+        self._valueformatters = {}
 
     @staticmethod
     def register_options(config):
@@ -166,8 +168,16 @@ class Command(object):
 
     def format_value(self, value, fmt):
         """ Formats an individual field using the table formatting codes"""
-        profile = addrspace.BufferAddressSpace(self._config).profile
-        return ("{0:" + self._formatlookup(profile, fmt) + "}").format(value)
+        ## This is often called for every row, so only work out the
+        ## format for each code once
+        try:
+            formatter = self._valueformatters[fmt]
+        except KeyError:
+            profile = addrspace.BufferAddressSpace(self._config).profile
+            formatter = ("{0:" + self._formatlookup(profile, fmt) + "}").format
+            self._valueformatters[fmt] = formatter
+
+        return formatter(value)
 
     def table_header(self, outfd, title_format_list = None):
         """Table header renders the title row of a table
@@ -179,6 +189,7 @@ class Command(object):
         titles = []
         rules = []
         self._formatlist = []
+        self._formatters = []
         profile = addrspace.BufferAddressSpace(self._config).profile
 
         for (k, v) in title_format_list:
@@ -195,6 +206,8 @@ class Command(object):
             titles.append(("{0:" + titlespec.to_string() + "}").format(k))
             rules.append("-" * titlespec.minwidth)
             self._formatlist.append(spec)
+            # Keep the bound format method so rows don't rebuild it
+            self._formatters.append((("{0:" + spec.to_string() + "}").format, spec.minwidth))
 
         # Write out the titles and line rules
         if outfd:
@@ -206,8 +219,6 @@ class Command(object):
         reslist = []
         if len(args) > len(self._formatlist):
             debug.error("Too many values for the table")
-        for index in range(len(args)):
-            spec = self._formatlist[index]
-            result = self._elide(("{0:" + spec.to_string() + "}").format(args[index]), spec.minwidth)
-            reslist.append(result)
+        for value, (formatter, minwidth) in zip(args, self._formatters):
+            reslist.append(self._elide(formatter(value), minwidth))
         outfd.write(self.tablesep.join(reslist) + "\n")
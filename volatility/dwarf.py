@@ -20,17 +20,23 @@
 
 import re
 
+# Nasty, but appears to parse the lines we need. A record is one line of
+# output: the level, statement_id and kind header (with either decimal or
+# hex statement ids) followed by the rest of the line holding the key value
+# pairs. Statement ids may carry a "+offset" suffix (eg. <12+34>).
+DWARF_RECORD_RE = re.compile(
+    r'^<(\d+)><(0x[0-9a-fA-F]+(?:[+]0x[0-9a-fA-F]+)?|\d+(?:[+]\d+)?)><(\w+)>([^\n]*)',
+    re.M)
+DWARF_KEY_VAL_RE = re.compile(
+    r'\s*(\w+)<([^>]*)>')
+# The operand following the opcode of a location expression, eg. the address
+# in "DW_OP_addr 0xc0123456", picked out just as split()[1] would
+DWARF_LOC_OPERAND_RE = re.compile(
+    r'\s*\S+\s+(\S+)')
+
 class DWARFParser(object):
     """A parser for DWARF files."""
 
-    # Nasty, but appears to parse the lines we need
-    dwarf_header_regex = re.compile(
-        r'<(?P<level>\d+)><(?P<statement_id>[0-9+]+)><(?P<kind>\w+)>')
-    dwarf_key_val_regex = re.compile(
-        '\s*(?P<keyname>\w+)<(?P<val>[^>]*)>')
-
-    dwarf_header_regex2 = re.compile(r'<(?P<level>\d+)><(?P<statement_id>0x[0-9a-fA-F]+([+]0x[0-9a-fA-F]+)?)><(?P<kind>\w+)>')
-
     sz2tp = {8: 'long long', 4: 'int', 2: 'short', 1: 'char'}
     tp2vol = {
         '_Bool': 'unsigned char',
@@ -51,14 +57,42 @@ class DWARFParser(object):
         'sizetype' : 'unsigned long',
     }
 
+    variable_kinds = frozenset(['DW_TAG_formal_parameter', 'DW_TAG_variable'])
+
+    base_types = frozenset(tp2vol.values() + sz2tp.values() +
+                           ['unsigned ' + tp for tp in sz2tp.values()] +
+                           ['void'])
+
+    # The parser state is touched for every record, and __slots__ makes
+    # those attribute accesses cheaper than going through a __dict__
+    __slots__ = ('current_level', 'name_stack', 'id_to_name', 'resolved_ids',
+                 'resolved_refs', 'deepest_cache', 'all_vtypes', 'vtypes',
+                 'enums', 'enum_refs', 'enum_choices', 'refcount', 'type_refs',
+                 'var_refs', 'unreferenced', 'all_vars', 'vars',
+                 'all_local_vars', 'local_vars', 'anons', 'base')
 
     def __init__(self, data = None):
+        # name_stack holds the [kind, name] of the enclosing statement at
+        # each level, indexed by level. DWARF nesting is shallow, so it is
+        # allocated up front and only grown if something goes deeper.
         self.current_level = -1
-        self.name_stack = []
+        self.name_stack = [None] * 32
         self.id_to_name = {}
+        self.resolved_ids = {}
+        self.resolved_refs = {}
+        self.deepest_cache = {}
         self.all_vtypes = {}
         self.vtypes = {}
         self.enums = {}
+        self.enum_refs = {}
+        self.enum_choices = {}
+        # Reference counts for every type name used by a member of
+        # all_vtypes or by all_vars, so unneeded unnamed types can be found
+        # without walking everything again
+        self.refcount = {}
+        self.type_refs = {}
+        self.var_refs = {}
+        self.unreferenced = set()
         self.all_vars = {}
         self.vars = {}
         self.all_local_vars = []
@@ -67,19 +101,77 @@ class DWARFParser(object):
         self.base = 10
 
         if data:
-            for line in data.splitlines():
-                self.feed_line(line)
+            self.feed(data)
+
+    @staticmethod
+    def ref_to_id(ref):
+        """Turns a '<id' type reference into the id it refers to."""
+        if ref[1:3] == "0x":
+            return "0x" + ref[3:].lstrip('0')
+        return ref[1:]
+
+    def referenced_ids(self, memb):
+        """Returns the ids of all the types memb refers to directly."""
+        if isinstance(memb, str) and memb.startswith('<'):
+            return [self.ref_to_id(memb)]
+        elif isinstance(memb, list):
+            result = []
+            for r in memb:
+                result += self.referenced_ids(r)
+            return result
+        return []
+
+    def resolve_ids(self):
+        """Resolve every type id of the compile unit, dependencies first.
+
+        Chains of references (typedef to const to pointer...) are followed
+        with an explicit stack rather than by recursion, so every id is
+        resolved exactly once and each resolve only has to look one level
+        down.
+        """
+        id_to_name = self.id_to_name
+        resolved_ids = self.resolved_ids
+        for start in id_to_name:
+            stack = [start]
+            while stack:
+                sid = stack[-1]
+                if sid in resolved_ids:
+                    stack.pop()
+                    continue
+
+                deps = [d for d in self.referenced_ids(id_to_name[sid])
+                        if d not in resolved_ids and d in id_to_name and d not in stack]
+                if deps:
+                    stack.extend(deps)
+                    continue
+
+                stack.pop()
+                try:
+                    resolved_ids[sid] = self.resolve(id_to_name[sid])
+                except KeyError:
+                    # Refers to an unknown id, which is only an error if
+                    # something actually uses it
+                    pass
 
     def resolve(self, memb):
         """Lookup anonymous member and replace it with a well known one."""
         # Reference to another type
         if isinstance(memb, str) and memb.startswith('<'):
-            if memb[1:3] == "0x":
-                memb = "<0x" + memb[3:].lstrip('0')
+            # Common types are referenced over and over, so remember what
+            # each reference resolved to within the compile unit
+            try:
+                return self.resolved_refs[memb]
+            except KeyError:
+                pass
 
-            resolved = self.id_to_name[memb[1:]]
+            sid = self.ref_to_id(memb)
+            try:
+                resolved = self.resolved_ids[sid]
+            except KeyError:
+                resolved = self.resolve(self.id_to_name[sid])
+            self.resolved_refs[memb] = resolved
 
-            return self.resolve(resolved)
+            return resolved
 
         elif isinstance(memb, list):
             return [self.resolve(r) for r in memb]
@@ -107,15 +199,26 @@ class DWARFParser(object):
 
     def get_deepest(self, t):
         if isinstance(t, list):
+            # Resolved types share their subtrees, so cache by identity. The
+            # list is kept in the cache too, so its id can't be reused.
+            try:
+                return self.deepest_cache[id(t)][1]
+            except KeyError:
+                pass
+
+            res = None
             if len(t) == 1:
-                return t[0]
+                res = t[0]
             else:
                 for part in t:
                     res = self.get_deepest(part)
                     if res:
-                        return res
+                        break
+                else:
+                    res = None
 
-                return None
+            self.deepest_cache[id(t)] = (t, res)
+            return res
 
         return None
 
@@ -130,129 +233,161 @@ class DWARFParser(object):
             else:
                 return self.sz2tp[sz]
 
-    def feed_line(self, line):
-        """Accepts another line from the input.
+    def feed(self, data):
+        """Accepts a block of complete lines from the input.
 
         A DWARF line looks like:
         <2><1442><DW_TAG_member> DW_AT_name<fs>  ...
 
         The header is level, statement_id, and kind followed by key value pairs.
+        The whole block is scanned in a single pass, rather than being split
+        into lines first.
         """
-        # Does the header match?
-        m = self.dwarf_header_regex.match(line)
-
-        if self.dwarf_header_regex2.match(line):
-            m = self.dwarf_header_regex2.match(line)
-            self.base = 16
-
-        if m:
-            parsed = m.groupdict()
-            parsed['data'] = {}
-            # Now parse the key value pairs
-            while m:
-                i = m.end()
-                m = self.dwarf_key_val_regex.search(line, i)
-                if m:
-                    d = m.groupdict()
-                    parsed['data'][d['keyname']] = d['val']
-
-            if parsed['kind'] in ('DW_TAG_formal_parameter', 'DW_TAG_variable'):
-                self.process_variable(parsed['data'])
+        for m in DWARF_RECORD_RE.finditer(data):
+            level, statement_id, kind, kv = m.groups()
+            if statement_id.startswith('0x'):
+                self.base = 16
+
+            # Tag and attribute names come from a small fixed set, so intern
+            # them to make the handler lookup and the data[...] lookups in the
+            # handlers compare by identity.
+            kind = intern(kind)
+
+            # Now parse the key value pairs. Most records (lexical blocks,
+            # subprograms, inlined calls etc) have no handler and only need to
+            # be tracked on the name stack, so don't bother with their
+            # attributes.
+            parsed_data = {}
+            if kind in self._handlers or kind in self.variable_kinds:
+                for key, val in DWARF_KEY_VAL_RE.findall(kv):
+                    parsed_data[intern(key)] = val
+
+            if kind in self.variable_kinds:
+                self.process_variable(parsed_data)
             else:
-                self.process_statement(**parsed) #pylint: disable-msg=W0142
-
-    def process_statement(self, kind, level, data, statement_id):
-        """Process a single parsed statement."""
-        new_level = int(level)
-        if new_level > self.current_level:
-            self.current_level = new_level
-            self.name_stack.append([])
-        elif new_level < self.current_level:
-            self.name_stack = self.name_stack[:new_level + 1]
-            self.current_level = new_level
-
-        self.name_stack[-1] = [kind, statement_id]
-
-        try:
-            parent_kind, parent_name = self.name_stack[-2]
-        except IndexError:
-            parent_kind, parent_name = (None, None)
-
-        if kind == 'DW_TAG_compile_unit':
-            self.finalize()
-            self.vtypes = {}
-            self.vars = {}
-            self.all_local_vars += self.local_vars
-            self.local_vars = []
-            self.id_to_name = {}
-
-        elif kind == 'DW_TAG_structure_type':
-            name = data.get('DW_AT_name', "__unnamed_%s" % statement_id).strip('"')
-
-            self.name_stack[-1][1] = name
-            self.id_to_name[statement_id] = [name]
-
-            # If it's just a forward declaration, we want the name around,
-            # but there won't be a size
-            if 'DW_AT_declaration' not in data:
-                self.vtypes[name] = [ int(data['DW_AT_byte_size'], self.base), {} ]
-
-        elif kind == 'DW_TAG_union_type':
-            name = data.get('DW_AT_name', "__unnamed_%s" % statement_id).strip('"')
-            self.name_stack[-1][1] = name
-            self.id_to_name[statement_id] = [name]
-            self.vtypes[name] = [ int(data['DW_AT_byte_size'], self.base), {} ]
-
-        elif kind == 'DW_TAG_array_type':
-            self.name_stack[-1][1] = statement_id
-            self.id_to_name[statement_id] = data['DW_AT_type']
-
-        elif kind == 'DW_TAG_enumeration_type':
-            name = data.get('DW_AT_name', "__unnamed_%s" % statement_id).strip('"')
-            self.name_stack[-1][1] = name
-            self.id_to_name[statement_id] = [name]
+                # Statement ids are the keys of id_to_name and are looked up
+                # again when references are resolved, so intern them once.
+                self.process_statement(kind, level, parsed_data,
+                                       intern(statement_id))
 
-            # If it's just a forward declaration, we want the name around,
-            # but there won't be a size
-            if 'DW_AT_declaration' not in data:
-                sz = int(data['DW_AT_byte_size'], self.base)
-                self.enums[name] = [sz, {}]
+    def feed_file(self, fd, chunk_size = 1024 * 1024):
+        """Accepts the input from a file like object, a chunk at a time.
 
-        elif kind == 'DW_TAG_pointer_type':
-            self.id_to_name[statement_id] = ['pointer', data.get('DW_AT_type', ['void'])]
-
-        elif kind == 'DW_TAG_base_type':
-            self.id_to_name[statement_id] = [self.base_type_name(data)]
+        This avoids holding the whole of a (possibly very large) dwarfdump
+        output in memory. Each chunk is cut after its last newline so that
+        feed() only ever sees complete lines.
+        """
+        partial = ""
+        while True:
+            data = fd.read(chunk_size)
+            if not data:
+                break
 
-        elif kind == 'DW_TAG_volatile_type':
-            self.id_to_name[statement_id] = data.get('DW_AT_type', ['void'])
+            data = partial + data
+            end = data.rfind("\n") + 1
+            partial = data[end:]
+            self.feed(data[:end])
 
-        elif kind == 'DW_TAG_const_type':
-            self.id_to_name[statement_id] = data.get('DW_AT_type', ['void'])
+        if partial:
+            self.feed(partial)
 
-        elif kind == 'DW_TAG_typedef':
-            self.id_to_name[statement_id] = data['DW_AT_type']
+    def process_statement(self, kind, level, data, statement_id):
+        """Process a single parsed statement."""
+        new_level = int(level)
+        if new_level >= len(self.name_stack):
+            self.name_stack.extend([None] * (new_level + 1))
+        self.current_level = new_level
 
-        elif kind == 'DW_TAG_subroutine_type':
-            self.id_to_name[statement_id] = ['void']         # Don't need these
+        self.name_stack[new_level] = [kind, statement_id]
 
-        elif kind == 'DW_TAG_variable' and level == '1':
-            if 'DW_AT_location' in data:
-                split = data['DW_AT_location'].split()
-                if len(split) > 1:
-                    loc = int(split[1], 0)
-                    self.vars[data['DW_AT_name']] = [loc, data['DW_AT_type']]
+        parent = new_level > 0 and self.name_stack[new_level - 1]
+        if parent:
+            parent_kind, parent_name = parent
+        else:
+            parent_kind, parent_name = (None, None)
 
-        elif kind == 'DW_TAG_subprogram':
-            # IDEK
-            pass
+        handler = self._handlers.get(kind)
+        if handler:
+            handler(self, statement_id, level, data, parent_kind, parent_name)
 
-        elif kind == 'DW_TAG_member' and parent_kind == 'DW_TAG_structure_type':
-            name = data.get('DW_AT_name', "__unnamed_%s" % statement_id).strip('"')
+    def _process_compile_unit(self, statement_id, level, data, parent_kind, parent_name):
+        self.finalize()
+        self.vtypes = {}
+        self.vars = {}
+        self.all_local_vars += self.local_vars
+        self.local_vars = []
+        self.id_to_name = {}
+        self.resolved_ids = {}
+        self.resolved_refs = {}
+
+    def _process_structure_type(self, statement_id, level, data, parent_kind, parent_name):
+        get = data.get
+        name = get('DW_AT_name', "__unnamed_%s" % statement_id).strip('"')
+
+        self.name_stack[self.current_level][1] = name
+        self.id_to_name[statement_id] = [name]
+
+        # If it's just a forward declaration, we want the name around,
+        # but there won't be a size
+        if 'DW_AT_declaration' not in data:
+            self.vtypes[name] = [ int(get('DW_AT_byte_size'), self.base), {} ]
+
+    def _process_union_type(self, statement_id, level, data, parent_kind, parent_name):
+        name = data.get('DW_AT_name', "__unnamed_%s" % statement_id).strip('"')
+        self.name_stack[self.current_level][1] = name
+        self.id_to_name[statement_id] = [name]
+        self.vtypes[name] = [ int(data['DW_AT_byte_size'], self.base), {} ]
+
+    def _process_array_type(self, statement_id, level, data, parent_kind, parent_name):
+        self.name_stack[self.current_level][1] = statement_id
+        self.id_to_name[statement_id] = data['DW_AT_type']
+
+    def _process_enumeration_type(self, statement_id, level, data, parent_kind, parent_name):
+        get = data.get
+        name = get('DW_AT_name', "__unnamed_%s" % statement_id).strip('"')
+        self.name_stack[self.current_level][1] = name
+        self.id_to_name[statement_id] = [name]
+
+        # If it's just a forward declaration, we want the name around,
+        # but there won't be a size
+        if 'DW_AT_declaration' not in data:
+            sz = int(get('DW_AT_byte_size'), self.base)
+            self.enums[name] = [sz, {}]
+            self.enum_choices.pop(name, None)
+
+    def _process_pointer_type(self, statement_id, level, data, parent_kind, parent_name):
+        self.id_to_name[statement_id] = ['pointer', data.get('DW_AT_type', ['void'])]
+
+    def _process_base_type(self, statement_id, level, data, parent_kind, parent_name):
+        self.id_to_name[statement_id] = [self.base_type_name(data)]
+
+    def _process_qualified_type(self, statement_id, level, data, parent_kind, parent_name):
+        """Volatile and const types are transparent."""
+        self.id_to_name[statement_id] = data.get('DW_AT_type', ['void'])
+
+    def _process_typedef(self, statement_id, level, data, parent_kind, parent_name):
+        self.id_to_name[statement_id] = data['DW_AT_type']
+
+    def _process_subroutine_type(self, statement_id, level, data, parent_kind, parent_name):
+        self.id_to_name[statement_id] = ['void']         # Don't need these
+
+    def _process_variable(self, statement_id, level, data, parent_kind, parent_name):
+        location = data.get('DW_AT_location')
+        if level == '1' and location is not None:
+            operand = DWARF_LOC_OPERAND_RE.match(location)
+            if operand:
+                loc = int(operand.group(1), 0)
+                self.vars[data['DW_AT_name']] = [loc, data['DW_AT_type']]
+
+    def _process_member(self, statement_id, level, data, parent_kind, parent_name):
+        if parent_kind == 'DW_TAG_structure_type':
+            get = data.get
+            name = get('DW_AT_name', "__unnamed_%s" % statement_id).strip('"')
+            location = get('DW_AT_data_member_location')
             try:
-                off = int(data['DW_AT_data_member_location'].split()[1])
+                off = int(DWARF_LOC_OPERAND_RE.match(location).group(1))
             except:
-                d = data['DW_AT_data_member_location']
+                d = location
                 idx = d.find("(")
 
                 if idx != -1:
@@ -260,10 +395,12 @@ class DWARFParser(object):
 
                 off = int(d)
 
-            if 'DW_AT_bit_size' in data and 'DW_AT_bit_offset' in data:
-                full_size = int(data['DW_AT_byte_size'], self.base) * 8
-                stbit = int(data['DW_AT_bit_offset'], self.base)
-                edbit = stbit + int(data['DW_AT_bit_size'], self.base)
+            bit_size = get('DW_AT_bit_size')
+            bit_offset = get('DW_AT_bit_offset')
+            if bit_size is not None and bit_offset is not None:
+                full_size = int(get('DW_AT_byte_size'), self.base) * 8
+                stbit = int(bit_offset, self.base)
+                edbit = stbit + int(bit_size, self.base)
                 stbit = full_size - stbit
                 edbit = full_size - edbit
                 stbit, edbit = edbit, stbit
@@ -274,11 +411,12 @@ class DWARFParser(object):
 
             self.vtypes[parent_name][1][name] = [off, memb_tp]
 
-        elif kind == 'DW_TAG_member' and parent_kind == 'DW_TAG_union_type':
+        elif parent_kind == 'DW_TAG_union_type':
             name = data.get('DW_AT_name', "__unnamed_%s" % statement_id).strip('"')
             self.vtypes[parent_name][1][name] = [0, data['DW_AT_type']]
 
-        elif kind == 'DW_TAG_enumerator' and parent_kind == 'DW_TAG_enumeration_type':
+    def _process_enumerator(self, statement_id, level, data, parent_kind, parent_name):
+        if parent_kind == 'DW_TAG_enumeration_type':
             name = data['DW_AT_name'].strip('"')
 
             try:
@@ -288,13 +426,15 @@ class DWARFParser(object):
 
             self.enums[parent_name][1][name] = val
 
-        elif kind == 'DW_TAG_subrange_type' and parent_kind == 'DW_TAG_array_type':
-            if 'DW_AT_upper_bound' in data:
+    def _process_subrange_type(self, statement_id, level, data, parent_kind, parent_name):
+        if parent_kind == 'DW_TAG_array_type':
+            upper_bound = data.get('DW_AT_upper_bound')
+            if upper_bound is not None:
                 try:
-                    sz = int(data['DW_AT_upper_bound'])
+                    sz = int(upper_bound)
                 except ValueError:
                     try:
-                        sz = int(data['DW_AT_upper_bound'].split('(')[0])
+                        sz = int(upper_bound.split('(')[0])
                     except ValueError:
                         # Give up
                         sz = 0
@@ -304,10 +444,26 @@ class DWARFParser(object):
 
             tp = self.id_to_name[parent_name]
             self.id_to_name[parent_name] = ['array', sz, tp]
-        else:
-            pass
-            #print "Skipping unsupported tag %s" % parsed['kind']
 
+    # Maps each DWARF tag to its handler, so dispatch is a single lookup.
+    # DW_TAG_subprogram and anything unsupported is skipped.
+    _handlers = {
+        'DW_TAG_compile_unit': _process_compile_unit,
+        'DW_TAG_structure_type': _process_structure_type,
+        'DW_TAG_union_type': _process_union_type,
+        'DW_TAG_array_type': _process_array_type,
+        'DW_TAG_enumeration_type': _process_enumeration_type,
+        'DW_TAG_pointer_type': _process_pointer_type,
+        'DW_TAG_base_type': _process_base_type,
+        'DW_TAG_volatile_type': _process_qualified_type,
+        'DW_TAG_const_type': _process_qualified_type,
+        'DW_TAG_typedef': _process_typedef,
+        'DW_TAG_subroutine_type': _process_subroutine_type,
+        'DW_TAG_variable': _process_variable,
+        'DW_TAG_member': _process_member,
+        'DW_TAG_enumerator': _process_enumerator,
+        'DW_TAG_subrange_type': _process_subrange_type,
+    }
 
     def process_variable(self, data):
         """Process a local variable."""
@@ -319,11 +475,18 @@ class DWARFParser(object):
 
     def finalize(self):
         """Finalize the output."""
+        self.deepest_cache = {}
+        self.resolve_ids()
         if self.vtypes:
             self.vtypes = self.resolve_refs()
+            for name, (_size, members) in self.vtypes.items():
+                self.set_refs(self.type_refs, name,
+                              [self.get_deepest(t) for t in members.values()])
             self.all_vtypes.update(self.vtypes)
         if self.vars:
             self.vars = dict(((k, self.resolve(v)) for k, v in self.vars.items()))
+            for name, (_loc, tp) in self.vars.items():
+                self.set_refs(self.var_refs, name, [self.get_deepest(tp)])
             self.all_vars.update(self.vars)
         if self.local_vars:
             self.local_vars = [ (name, lineno, decl_file, self.resolve(tp)) for
@@ -331,36 +494,95 @@ class DWARFParser(object):
             self.all_local_vars += self.local_vars
 
         # Get rid of unneeded unknowns (shades of Rumsfeld here)
-        # Needs to be done in fixed point fashion
-        changed = True
-        while changed:
-            changed = False
-            s = set()
-            for m in self.all_vtypes:
-                for t in self.all_vtypes[m][1].values():
-                    s.add(self.get_deepest(t))
-            for m in self.all_vars:
-                s.add(self.get_deepest(self.all_vars[m][1]))
-            for v in list(self.all_vtypes):
-                if v.startswith('__unnamed_') and v not in s:
-                    del self.all_vtypes[v]
-                    changed = True
-
-        # Merge the enums into the types directly:
-        for t in self.all_vtypes:
-            for m in list(self.all_vtypes[t][1]):
-                memb = self.all_vtypes[t][1][m]
-                d = self.get_deepest(memb)
+        # The reference counts are kept up to date as types come and go, so
+        # only the names whose count dropped to zero need looking at.
+        # Deleting a type releases its own references in turn.
+        while self.unreferenced:
+            v = self.unreferenced.pop()
+            if (v.startswith('__unnamed_') and v in self.all_vtypes and
+                    v not in self.refcount):
+                del self.all_vtypes[v]
+                for r in self.type_refs.pop(v):
+                    self.drop_ref(r)
+
+        # Merge the enums into the types directly. Types from earlier compile
+        # units have already been merged, so only the members of this unit's
+        # types need looking at. Members referring to a name we know nothing
+        # about yet (e.g. a forward declared enum) are kept aside until it
+        # turns up.
+        for t in self.vtypes:
+            if t not in self.all_vtypes:
+                continue
+            members = self.all_vtypes[t][1]
+            for m in list(members):
+                d = self.get_deepest(members[m])
                 if d in self.enums:
-                    sz = self.enums[d][0]
-                    vals = dict((v, k) for k, v in self.enums[d][1].items())
-                    self.all_vtypes[t][1][m] = self.deep_replace(
-                        memb, [d],
-                        ['Enumeration', dict(target = self.sz2tp[sz], choices = vals)]
-                    )
+                    self.merge_enum(t, m, d)
+                elif d and d not in self.all_vtypes and d not in self.base_types:
+                    self.enum_refs.setdefault(d, []).append((t, m))
 
+        for d in [d for d in self.enum_refs if d in self.enums]:
+            for t, m in self.enum_refs.pop(d):
+                try:
+                    memb = self.all_vtypes[t][1][m]
+                except KeyError:
+                    continue
+                if self.get_deepest(memb) == d:
+                    self.merge_enum(t, m, d)
+
+        self.deepest_cache = {}
         return self.all_vtypes
 
+    def add_ref(self, name):
+        """Count a reference to the type called name."""
+        count = self.refcount.get(name, 0)
+        self.refcount[name] = count + 1
+        if not count:
+            self.unreferenced.discard(name)
+
+    def drop_ref(self, name):
+        """Release a reference to the type called name."""
+        count = self.refcount[name] - 1
+        if count:
+            self.refcount[name] = count
+        else:
+            del self.refcount[name]
+            self.unreferenced.add(name)
+
+    def set_refs(self, table, name, refs):
+        """Record the types that the type or variable name refers to.
+
+        Any references held by a previous definition of name are released
+        first.
+        """
+        refs = [r for r in refs if r]
+        for r in table.get(name, ()):
+            self.drop_ref(r)
+        for r in refs:
+            self.add_ref(r)
+        table[name] = refs
+
+        if name not in self.refcount:
+            self.unreferenced.add(name)
+
+    def merge_enum(self, t, m, d):
+        """Replace the enum d within member m of type t with an Enumeration."""
+        memb = self.all_vtypes[t][1][m]
+        sz = self.enums[d][0]
+        # The choices are read only, so every member using this enum shares
+        # the one inverted dict
+        vals = self.enum_choices.get(d)
+        if vals is None:
+            vals = dict((v, k) for k, v in self.enums[d][1].items())
+            self.enum_choices[d] = vals
+        self.all_vtypes[t][1][m] = self.deep_replace(
+            memb, [d],
+            ['Enumeration', dict(target = self.sz2tp[sz], choices = vals)]
+        )
+        # The member no longer refers to d
+        self.type_refs[t].remove(d)
+        self.drop_ref(d)
+
     def print_output(self):
         self.finalize()
         print "linux_types = {"
@@ -379,5 +601,6 @@ class DWARFParser(object):
 
 if __name__ == '__main__':
     import sys
-    dp = DWARFParser(open(sys.argv[1], "rb").read())
+    dp = DWARFParser()
+    dp.feed_file(open(sys.argv[1], "rb"))
     dp.print_output()
@@ -831,6 +831,8 @@ class Profile(object):
     def __init__(self, strict = False):
         self.strict = strict
         self._mods = []
+        self._obj_offsets = {}
+        self._obj_sizes = {}
 
         # The "output" variables
         self.types = {}
@@ -935,6 +937,10 @@ class Profile(object):
             left in a bad/unusable state
         """
 
+        # Any offsets and sizes worked out against the previous types are now stale
+        self._obj_offsets = {}
+        self._obj_sizes = {}
+
         # Load the native types
         self.types = {}
         for nt, value in self.native_types.items():
@@ -994,16 +1000,35 @@ class Profile(object):
         return theType in self.types
 
     def get_obj_offset(self, name, member):
-        """ Returns a members offset within the struct """
+        """ Returns a members offset within the struct
+
+            This is called for every element by the list walkers, and
+            building the dummy object is expensive, so offsets are remembered
+            until the profile is next compiled.
+        """
+        try:
+            return self._obj_offsets[name, member]
+        except KeyError:
+            pass
+
         tmp = self._get_dummy_obj(name)
         offset, _cls = tmp.members[member]
 
+        self._obj_offsets[name, member] = offset
         return offset
 
     def get_obj_size(self, name):
         """Returns the size of a struct"""
+        try:
+            return self._obj_sizes[name]
+        except KeyError:
+            pass
+
         tmp = self._get_dummy_obj(name)
-        return tmp.size()
+        size = tmp.size()
+
+        self._obj_sizes[name] = size
+        return size
 
     def obj_has_member(self, name, member):
         """Returns whether an object has a certain member"""
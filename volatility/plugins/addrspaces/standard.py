@@ -29,6 +29,7 @@ import volatility.addrspace as addrspace
 import volatility.debug as debug #pylint: disable-msg=W0611
 import urllib
 import os
+import mmap
 
 #pylint: disable-msg=C0111
 
@@ -84,6 +85,18 @@ class FileAddressSpace(addrspace.BaseAddressSpace):
         self.fhandle.seek(0, 2)
         self.fsize = self.fhandle.tell()
 
+        # Map the file read-only where we can, so that reads (particularly
+        # the scanners going over the whole image) are slices of the page
+        # cache rather than a seek and read each time. Mapping can fail,
+        # for example with large images on 32-bit pythons or empty files,
+        # in which case we just read the file.
+        self.fmap = None
+        if not config.WRITE:
+            try:
+                self.fmap = mmap.mmap(self.fhandle.fileno(), 0, access = mmap.ACCESS_READ)
+            except (EnvironmentError, ValueError, OverflowError):
+                self.fmap = None
+
     # Abstract Classes cannot register options, and since this checks config.WRITE in __init__, we define the option here
     @staticmethod
     def register_options(config):
@@ -96,8 +109,11 @@ class FileAddressSpace(addrspace.BaseAddressSpace):
 
     def read(self, addr, length):
         addr, length = int(addr), int(length)
-        self.fhandle.seek(addr)
-        data = self.fhandle.read(length)
+        if self.fmap is not None and addr >= 0 and length >= 0:
+            data = self.fmap[addr:addr + length]
+        else:
+            self.fhandle.seek(addr)
+            data = self.fhandle.read(length)
         if len(data) == 0:
             return None
         return data
@@ -126,6 +142,8 @@ class FileAddressSpace(addrspace.BaseAddressSpace):
         return 0 <= addr < self.fsize
 
     def close(self):
+        if self.fmap is not None:
+            self.fmap.close()
         self.fhandle.close()
 
     def write(self, addr, data):
@@ -20,6 +20,7 @@
 #
 
 """ This plugin contains CORE classes used by lots of other plugins """
+import struct
 import volatility.scan as scan
 import volatility.obj as obj
 import volatility.debug as debug #pylint: disable-msg=W0611
@@ -36,13 +37,50 @@ def pool_align(vm, object_name, align):
     """Returns the size of the object accounting for pool alignment."""
     size_of_obj = vm.profile.get_obj_size(object_name)
 
-    # Size is rounded to pool alignment
+    # Size is rounded to pool alignment, which is always a power of two
+    # in practice (8 or 16), so that can be done with a mask
+    if align > 0 and align & (align - 1) == 0:
+        return (size_of_obj + align - 1) & ~(align - 1)
+
     extra = size_of_obj % align
     if extra:
         size_of_obj += align - extra
 
     return size_of_obj
 
+## The layout of _POOL_HEADER members, by profile and member name
+_pool_header_fields = {}
+
+def pool_header_field(vm, pool_base, member):
+    """Returns a member of the _POOL_HEADER at pool_base, just as
+    _POOL_HEADER.<member>.v() would.
+
+    This is called for every allocation the pool scanners find, so
+    rather than instantiating the header each time, the member's
+    layout is worked out once per profile and the value unpacked
+    straight from the address space.
+    """
+    if not vm.is_valid_address(pool_base):
+        return obj.NoneObject("Invalid Address 0x{0:08X}, instantiating _POOL_HEADER".format(pool_base))
+
+    layout = _pool_header_fields.get((vm.profile, member))
+    if layout is None:
+        pool_hdr = obj.Object('_POOL_HEADER', vm = vm, offset = pool_base)
+        field = pool_hdr.m(member)
+
+        layout = (field.obj_offset - pool_base, field.format_string, field.size(),
+                  (1 << field.end_bit) - 1, field.start_bit)
+        _pool_header_fields[vm.profile, member] = layout
+
+    field_offset, format_string, size, mask, start_bit = layout
+
+    data = vm.read(pool_base + field_offset, size)
+    if not data:
+        return obj.NoneObject("Unable to read {0} bytes from {1}".format(size, pool_base + field_offset))
+
+    (val,) = struct.unpack(format_string, data)
+    return (long(val) & mask) >> start_bit
+
 ## The following are checks for pool scanners.
 
 class PoolTagCheck(scan.ScannerCheck):
@@ -50,17 +88,17 @@ class PoolTagCheck(scan.ScannerCheck):
     def __init__(self, address_space, tag = None, **kwargs):
         scan.ScannerCheck.__init__(self, address_space, **kwargs)
         self.tag = tag
+        self.tag_length = len(tag)
 
     def skip(self, data, offset):
-        try:
-            nextval = data.index(self.tag, offset + 1)
-            return nextval - offset
-        except ValueError:
+        nextval = data.find(self.tag, offset + 1)
+        if nextval == -1:
             ## Substring is not found - skip to the end of this data buffer
             return len(data) - offset
+        return nextval - offset
 
     def check(self, offset):
-        data = self.address_space.read(offset, len(self.tag))
+        data = self.address_space.read(offset, self.tag_length)
         return data == self.tag
 
 class CheckPoolSize(scan.ScannerCheck):
@@ -68,16 +106,12 @@ class CheckPoolSize(scan.ScannerCheck):
     def __init__(self, address_space, condition = (lambda x: x == 8), **kwargs):
         scan.ScannerCheck.__init__(self, address_space, **kwargs)
         self.condition = condition
+        self.pool_alignment = obj.VolMagic(self.address_space).PoolAlignment.v()
 
     def check(self, offset):
-        pool_hdr = obj.Object('_POOL_HEADER', vm = self.address_space,
-                             offset = offset - 4)
-
-        block_size = pool_hdr.BlockSize.v()
-
-        pool_alignment = obj.VolMagic(self.address_space).PoolAlignment.v()
+        block_size = pool_header_field(self.address_space, offset - 4, 'BlockSize')
 
-        return self.condition(block_size * pool_alignment)
+        return self.condition(block_size * self.pool_alignment)
 
 class CheckPoolType(scan.ScannerCheck):
     """ Check the pool type """
@@ -87,14 +121,25 @@ class CheckPoolType(scan.ScannerCheck):
         self.non_paged = non_paged
         self.paged = paged
         self.free = free
+        self.matches = {}
 
     def check(self, offset):
-        pool_hdr = obj.Object('_POOL_HEADER', vm = self.address_space,
-                             offset = offset - 4)
+        pool_type = pool_header_field(self.address_space, offset - 4, 'PoolType')
+        if pool_type == None:
+            return False
 
-        return ((self.non_paged and pool_hdr.NonPagedPool) or
-               (self.free and pool_hdr.FreePool) or
-               (self.paged and pool_hdr.PagedPool))
+        # Which pool types are paged differs between profiles, so we
+        # ask the profile's _POOL_HEADER the first time we see a type
+        if pool_type not in self.matches:
+            pool_hdr = obj.Object('_POOL_HEADER', vm = self.address_space,
+                                 offset = offset - 4)
+
+            self.matches[pool_type] = bool(
+                (self.non_paged and pool_hdr.NonPagedPool) or
+                (self.free and pool_hdr.FreePool) or
+                (self.paged and pool_hdr.PagedPool))
+
+        return self.matches[pool_type]
 
 class CheckPoolIndex(scan.ScannerCheck):
     """ Checks the pool index """
@@ -103,7 +148,4 @@ class CheckPoolIndex(scan.ScannerCheck):
         self.value = value
 
     def check(self, offset):
-        pool_hdr = obj.Object('_POOL_HEADER', vm = self.address_space,
-                             offset = offset - 4)
-
-        return pool_hdr.PoolIndex == self.value
+        return pool_header_field(self.address_space, offset - 4, 'PoolIndex') == self.value
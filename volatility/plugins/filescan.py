@@ -25,6 +25,7 @@
 @organization: http://computer.forensikblog.de/en/
 """
 
+import struct
 import volatility.scan as scan
 import volatility.plugins.common as common
 import volatility.debug as debug #pylint: disable-msg=W0611
@@ -39,6 +40,54 @@ class PoolScanFile(scan.PoolScanner):
                ('CheckPoolIndex', dict(value = 0)),
                ]
 
+def add_processes_option(config):
+    """ Adds the --processes option used to pass scan_parallel the
+    number of processes to scan with """
+    config.add_option("PROCESSES", type = 'int', default = 1,
+                      help = "Number of processes to scan with (memory mapped images only, " \
+                             "--write disables parallel scanning)")
+
+class ObjectTypeFilter(object):
+    """ Tells whether the _OBJECT_HEADER at an offset is of a given type
+
+    Most pool hits turn out to be of the wrong type, and building the
+    _OBJECT_HEADER (with its optional headers) just to ask it is
+    expensive. The type only depends on the header's TypeIndex (Windows 7)
+    or Type pointer (earlier versions), so we read that member on its
+    own and remember the answer for every value we have seen.
+    """
+    def __init__(self, address_space, kernel_as, type_name):
+        self.address_space = address_space
+        self.kernel_as = kernel_as
+        self.type_name = type_name
+        self.matches = {}
+
+        profile = address_space.profile
+        if profile.obj_has_member('_OBJECT_HEADER', 'TypeIndex'):
+            self.member, self.member_type = 'TypeIndex', 'unsigned char'
+        else:
+            self.member, self.member_type = 'Type', 'address'
+
+        self.member_offset = profile.get_obj_offset('_OBJECT_HEADER', self.member)
+
+    def matches_type(self, offset):
+        """ Returns True if the _OBJECT_HEADER at offset is of our type """
+        if not self.address_space.is_valid_address(offset):
+            return False
+
+        value = obj.Object(self.member_type, offset = offset + self.member_offset,
+                           vm = self.address_space).v()
+        if value == None:
+            return False
+
+        if value not in self.matches:
+            object_obj = obj.Object("_OBJECT_HEADER", vm = self.address_space,
+                                   offset = offset, native_vm = self.kernel_as)
+
+            self.matches[value] = object_obj.get_object_type() == self.type_name
+
+        return self.matches[value]
+
 class FileScan(common.AbstractWindowsCommand):
     """ Scan Physical memory for _FILE_OBJECT pool allocations
     """
@@ -52,6 +101,10 @@ class FileScan(common.AbstractWindowsCommand):
     meta_info['os'] = 'WIN_32_XP_SP2'
     meta_info['version'] = '0.1'
 
+    def __init__(self, config, *args, **kwargs):
+        common.AbstractWindowsCommand.__init__(self, config, *args, **kwargs)
+        add_processes_option(config)
+
     # Can't be cached until self.kernel_address_space is moved entirely within calculate
     def calculate(self):
         ## Just grab the AS and scan it using our scanner
@@ -60,31 +113,33 @@ class FileScan(common.AbstractWindowsCommand):
         ## Will need the kernel AS for later:
         kernel_as = utils.load_as(self._config)
 
-        for offset in PoolScanFile().scan(address_space):
+        ## These do not change from one allocation to the next
+        pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
+        file_obj_size = common.pool_align(kernel_as, "_FILE_OBJECT", pool_alignment)
+        body_offset = address_space.profile.get_obj_offset('_OBJECT_HEADER', 'Body')
+        type_filter = ObjectTypeFilter(address_space, kernel_as, "File")
+
+        for offset in PoolScanFile().scan_parallel(address_space, self._config.PROCESSES):
 
-            pool_obj = obj.Object("_POOL_HEADER", vm = address_space,
-                                 offset = offset)
+            block_size = common.pool_header_field(address_space, offset, 'BlockSize')
 
             ## We work out the _FILE_OBJECT from the end of the
             ## allocation (bottom up).
-            pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
-
             file_obj = obj.Object("_FILE_OBJECT", vm = address_space,
-                     offset = (offset + pool_obj.BlockSize * pool_alignment -
-                     common.pool_align(kernel_as, "_FILE_OBJECT", pool_alignment)),
+                     offset = (offset + block_size * pool_alignment -
+                     file_obj_size),
                      native_vm = kernel_as
                      )
 
             ## The _OBJECT_HEADER is immediately below the _FILE_OBJECT
+            if not type_filter.matches_type(file_obj.obj_offset - body_offset):
+                continue
+
             object_obj = obj.Object("_OBJECT_HEADER", vm = address_space,
-                                   offset = file_obj.obj_offset -
-                                   address_space.profile.get_obj_offset('_OBJECT_HEADER', 'Body'),
+                                   offset = file_obj.obj_offset - body_offset,
                                    native_vm = kernel_as
                                    )
 
-            if object_obj.get_object_type() != "File":
-                continue
-
             ## If the string is not reachable we skip it
             if not file_obj.FileName.v():
                 continue
@@ -122,43 +177,48 @@ class DriverScan(FileScan):
         ## Will need the kernel AS for later:
         kernel_as = utils.load_as(self._config)
 
-        for offset in PoolScanDriver().scan(address_space):
-            pool_obj = obj.Object("_POOL_HEADER", vm = address_space,
-                                 offset = offset)
+        ## These do not change from one allocation to the next
+        pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
+        extension_size = common.pool_align(kernel_as, "_DRIVER_EXTENSION", pool_alignment)
+        driver_size = common.pool_align(kernel_as, "_DRIVER_OBJECT", pool_alignment)
+        body_offset = address_space.profile.get_obj_offset('_OBJECT_HEADER', 'Body')
+        type_filter = ObjectTypeFilter(address_space, kernel_as, "Driver")
+
+        for offset in PoolScanDriver().scan_parallel(address_space, self._config.PROCESSES):
+            block_size = common.pool_header_field(address_space, offset, 'BlockSize')
 
             ## We work out the _DRIVER_OBJECT from the end of the
-            ## allocation (bottom up).
-            pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
+            ## allocation (bottom up). The _DRIVER_OBJECT is immediately
+            ## below the _DRIVER_EXTENSION, and the _OBJECT_HEADER is
+            ## immediately below the _DRIVER_OBJECT.
+            extension_offset = offset + block_size * pool_alignment - extension_size
+            driver_offset = extension_offset - driver_size
+            header_offset = driver_offset - body_offset
+
+            if not (address_space.is_valid_address(extension_offset) and
+                    address_space.is_valid_address(driver_offset)):
+                continue
+
+            ## Only build the objects once the header is known to be ours
+            if not type_filter.matches_type(header_offset):
+                continue
 
             extension_obj = obj.Object(
                 "_DRIVER_EXTENSION", vm = address_space,
-                offset = (offset + pool_obj.BlockSize * pool_alignment -
-                          common.pool_align(kernel_as, "_DRIVER_EXTENSION", pool_alignment)),
-                native_vm = kernel_as)
+                offset = extension_offset, native_vm = kernel_as)
 
-            ## The _DRIVER_OBJECT is immediately below the _DRIVER_EXTENSION
             driver_obj = obj.Object(
                 "_DRIVER_OBJECT", vm = address_space,
-                offset = extension_obj.obj_offset -
-                    common.pool_align(kernel_as, "_DRIVER_OBJECT", pool_alignment),
-                native_vm = kernel_as
-                )
+                offset = driver_offset, native_vm = kernel_as)
 
-            ## The _OBJECT_HEADER is immediately below the _DRIVER_OBJECT
             object_obj = obj.Object(
                 "_OBJECT_HEADER", vm = address_space,
-                offset = driver_obj.obj_offset -
-                address_space.profile.get_obj_offset('_OBJECT_HEADER', 'Body'),
-                native_vm = kernel_as
-                )
+                offset = header_offset, native_vm = kernel_as)
 
             ## Skip unallocated objects
             #if object_obj.Type == 0xbad0b0b0:
             #    continue
 
-            if object_obj.get_object_type() != "Driver":
-                continue
-
             yield (object_obj, driver_obj, extension_obj)
 
 
@@ -204,30 +264,32 @@ class SymLinkScan(FileScan):
         ## Will need the kernel AS for later:
         kernel_as = utils.load_as(self._config)
 
-        for offset in PoolScanSymlink().scan(address_space):
-            pool_obj = obj.Object("_POOL_HEADER", vm = address_space,
-                                 offset = offset)
+        ## These do not change from one allocation to the next
+        pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
+        link_size = common.pool_align(kernel_as, "_OBJECT_SYMBOLIC_LINK", pool_alignment)
+        body_offset = address_space.profile.get_obj_offset('_OBJECT_HEADER', 'Body')
+        type_filter = ObjectTypeFilter(address_space, kernel_as, "SymbolicLink")
+
+        for offset in PoolScanSymlink().scan_parallel(address_space, self._config.PROCESSES):
+            block_size = common.pool_header_field(address_space, offset, 'BlockSize')
 
             ## We work out the object from the end of the
             ## allocation (bottom up).
-            pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
-
             link_obj = obj.Object("_OBJECT_SYMBOLIC_LINK", vm = address_space,
-                     offset = (offset + pool_obj.BlockSize * pool_alignment -
-                               common.pool_align(kernel_as, "_OBJECT_SYMBOLIC_LINK", pool_alignment)),
+                     offset = (offset + block_size * pool_alignment -
+                               link_size),
                      native_vm = kernel_as)
 
             ## The _OBJECT_HEADER is immediately below the _OBJECT_SYMBOLIC_LINK
+            if not type_filter.matches_type(link_obj.obj_offset - body_offset):
+                continue
+
             object_obj = obj.Object(
                 "_OBJECT_HEADER", vm = address_space,
-                offset = link_obj.obj_offset -
-                address_space.profile.get_obj_offset('_OBJECT_HEADER', 'Body'),
+                offset = link_obj.obj_offset - body_offset,
                 native_vm = kernel_as
                 )
 
-            if object_obj.get_object_type() != "SymbolicLink":
-                continue
-
             yield object_obj, link_obj
 
     def render_text(self, outfd, data):
@@ -271,31 +333,33 @@ class MutantScan(FileScan):
         ## Will need the kernel AS for later:
         kernel_as = utils.load_as(self._config)
 
-        for offset in PoolScanMutant().scan(address_space):
-            pool_obj = obj.Object("_POOL_HEADER", vm = address_space,
-                                 offset = offset)
+        ## These do not change from one allocation to the next
+        pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
+        mutant_size = common.pool_align(kernel_as, "_KMUTANT", pool_alignment)
+        body_offset = address_space.profile.get_obj_offset('_OBJECT_HEADER', 'Body')
+        type_filter = ObjectTypeFilter(address_space, kernel_as, "Mutant")
+
+        for offset in PoolScanMutant().scan_parallel(address_space, self._config.PROCESSES):
+            block_size = common.pool_header_field(address_space, offset, 'BlockSize')
 
             ## We work out the _DRIVER_OBJECT from the end of the
             ## allocation (bottom up).
-            pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
-
             mutant = obj.Object(
                 "_KMUTANT", vm = address_space,
-                offset = (offset + pool_obj.BlockSize * pool_alignment -
-                          common.pool_align(kernel_as, "_KMUTANT", pool_alignment)),
+                offset = (offset + block_size * pool_alignment -
+                          mutant_size),
                 native_vm = kernel_as)
 
             ## The _OBJECT_HEADER is immediately below the _KMUTANT
+            if not type_filter.matches_type(mutant.obj_offset - body_offset):
+                continue
+
             object_obj = obj.Object(
                 "_OBJECT_HEADER", vm = address_space,
-                offset = mutant.obj_offset -
-                address_space.profile.get_obj_offset('_OBJECT_HEADER', 'Body'),
+                offset = mutant.obj_offset - body_offset,
                 native_vm = kernel_as
                 )
 
-            if object_obj.get_object_type() != "Mutant":
-                continue
-
             ## Skip unallocated objects
             ##if object_obj.Type == 0xbad0b0b0:
             ##   continue
@@ -337,6 +401,36 @@ class CheckProcess(scan.ScannerCheck):
     """ Check sanity of _EPROCESS """
     kernel = 0x80000000
 
+    def __init__(self, address_space, **kwargs):
+        scan.ScannerCheck.__init__(self, address_space, **kwargs)
+
+        ## This check runs on every hit, so rather than building an
+        ## _EPROCESS each time we read the few fields we test straight
+        ## out of the buffer. The DirectoryTableBase and the list
+        ## pointers are all the size of an address in every profile.
+        profile = address_space.profile
+
+        self.address_format = profile.native_types['address'][1]
+        self.address_size = struct.calcsize(self.address_format)
+
+        self.pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
+        self.eprocess_size = common.pool_align(address_space, '_EPROCESS', self.pool_alignment)
+
+        self.dtb_offset = (profile.get_obj_offset('_EPROCESS', 'Pcb') +
+                           profile.get_obj_offset('_KPROCESS', 'DirectoryTableBase'))
+
+        list_offset = profile.get_obj_offset('_EPROCESS', 'ThreadListHead')
+        self.flink_offset = list_offset + profile.get_obj_offset('_LIST_ENTRY', 'Flink')
+        self.blink_offset = list_offset + profile.get_obj_offset('_LIST_ENTRY', 'Blink')
+
+    def read_address(self, offset):
+        """ Reads an address sized value, or None if there is no data """
+        data = self.address_space.read(offset, self.address_size)
+        if not data:
+            return None
+
+        return struct.unpack(self.address_format, data)[0]
+
     def check(self, found):
         ## The offset of the object is determined by subtracting the offset
         ## of the PoolTag member to get the start of Pool Object. This done
@@ -344,25 +438,31 @@ class CheckProcess(scan.ScannerCheck):
         pool_base = found - self.address_space.profile.get_obj_offset(
             '_POOL_HEADER', 'PoolTag')
 
-        pool_obj = obj.Object("_POOL_HEADER", vm = self.address_space,
-                                 offset = pool_base)
+        block_size = common.pool_header_field(self.address_space, pool_base, 'BlockSize')
+        if block_size == None:
+            return False
 
         ## We work out the _EPROCESS from the end of the
         ## allocation (bottom up).
-        pool_alignment = obj.VolMagic(self.address_space).PoolAlignment.v()
-        eprocess = obj.Object("_EPROCESS", vm = self.address_space,
-                  offset = pool_base + pool_obj.BlockSize * pool_alignment -
-                  common.pool_align(self.address_space, '_EPROCESS', pool_alignment))
+        eprocess_offset = pool_base + block_size * self.pool_alignment - self.eprocess_size
 
-        if (eprocess.Pcb.DirectoryTableBase == 0):
+        if not self.address_space.is_valid_address(eprocess_offset):
             return False
 
-        if (eprocess.Pcb.DirectoryTableBase % 0x20 != 0):
+        dtb = self.read_address(eprocess_offset + self.dtb_offset)
+
+        if not dtb:
             return False
 
-        list_head = eprocess.ThreadListHead
+        if dtb % 0x20 != 0:
+            return False
+
+        flink = self.read_address(eprocess_offset + self.flink_offset)
+        if flink == None or flink < self.kernel:
+            return False
 
-        if (list_head.Flink < self.kernel) or (list_head.Blink < self.kernel):
+        blink = self.read_address(eprocess_offset + self.blink_offset)
+        if blink == None or blink < self.kernel:
             return False
 
         return True
@@ -382,14 +482,13 @@ class PoolScanProcess(scan.PoolScanner):
         pool_base = found - self.buffer.profile.get_obj_offset(
             '_POOL_HEADER', 'PoolTag')
 
-        pool_obj = obj.Object("_POOL_HEADER", vm = address_space,
-                                 offset = pool_base)
+        block_size = common.pool_header_field(address_space, pool_base, 'BlockSize')
 
         ## We work out the _EPROCESS from the end of the
         ## allocation (bottom up).
         pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
 
-        object_base = (pool_base + pool_obj.BlockSize * pool_alignment -
+        object_base = (pool_base + block_size * pool_alignment -
                        common.pool_align(address_space, '_EPROCESS', pool_alignment))
 
         return object_base
@@ -415,6 +514,10 @@ class PSScan(common.AbstractWindowsCommand):
     meta_info['os'] = ['Win7SP0x86', 'WinXPSP3x86']
     meta_info['version'] = '0.1'
 
+    def __init__(self, config, *args, **kwargs):
+        common.AbstractWindowsCommand.__init__(self, config, *args, **kwargs)
+        add_processes_option(config)
+
     # Can't be cached until self.kernel_address_space is moved entirely
     # within calculate
     def calculate(self):
@@ -422,7 +525,7 @@ class PSScan(common.AbstractWindowsCommand):
         address_space = utils.load_as(self._config, astype = 'physical')
         kernel_as = utils.load_as(self._config)
 
-        for offset in PoolScanProcess().scan(address_space):
+        for offset in PoolScanProcess().scan_parallel(address_space, self._config.PROCESSES):
             eprocess = obj.Object('_EPROCESS', vm = address_space,
                                   native_vm = kernel_as, offset = offset)
             yield eprocess
@@ -454,26 +557,25 @@ class PSScan(common.AbstractWindowsCommand):
         links = set()
 
         for eprocess in data:
-            label = "{0} | {1} |".format(eprocess.UniqueProcessId,
-                                         eprocess.ImageFileName)
-            if eprocess.ExitTime:
-                label += "exited\\n{0}".format(eprocess.ExitTime)
+            pid = eprocess.UniqueProcessId
+            exit_time = eprocess.ExitTime
+
+            label = "{0} | {1} |".format(pid, eprocess.ImageFileName)
+            if exit_time:
+                label += "exited\\n{0}".format(exit_time)
                 options = ' style = "filled" fillcolor = "lightgray" '
             else:
                 label += "running"
                 options = ''
 
-            objects.add('pid{0} [label="{1}" shape="record" {2}];\n'.format(eprocess.UniqueProcessId,
+            objects.add('pid{0} [label="{1}" shape="record" {2}];\n'.format(pid,
                                                                             label, options))
             links.add("pid{0} -> pid{1} [];\n".format(eprocess.InheritedFromUniqueProcessId,
-                                                      eprocess.UniqueProcessId))
+                                                      pid))
 
         ## Now write the dot file
         outfd.write("digraph processtree { \ngraph [rankdir = \"TB\"];\n")
-        for link in links:
-            outfd.write(link)
-
-        for item in objects:
-            outfd.write(item)
+        outfd.write("".join(links))
+        outfd.write("".join(objects))
         outfd.write("}")
 
@@ -27,28 +27,34 @@ import volatility.plugins.gui.windowstations as windowstations
 class PoolScanAtom(scan.PoolScanner):
     """Pool scanner for atom tables"""
 
-    def object_offset(self, found, address_space):
-        """ This returns the offset of the object contained within
-        this pool allocation.
-        """
-        pool_base = found - \
-                self.buffer.profile.get_obj_offset('_POOL_HEADER', 'PoolTag')
+    def build_constraints(self, address_space):
+        scan.PoolScanner.build_constraints(self, address_space)
 
         ## Note: all OS after XP, there are an extra 8 bytes (for 32-bit)
         ## or 16 bytes (for 64-bit) between the _POOL_HEADER and _RTL_ATOM_TABLE. 
         ## This is variable length structure, so we can't use the bottom-up
         ## approach as we do with other object scanners - because the size of an
         ## _RTL_ATOM_TABLE differs depending on the number of hash buckets. 
+        ## The profile metadata is costly to build, so we work this out
+        ## once per scan rather than for every hit.
+
+        metadata = address_space.profile.metadata
 
-        build = (self.buffer.profile.metadata.get('major', 0),
-                 self.buffer.profile.metadata.get('minor', 0))
+        build = (metadata.get('major', 0), metadata.get('minor', 0))
 
-        if self.buffer.profile.metadata.get('memory_model', '32bit') == '32bit':
-            fixup = 8 if build > (5, 1) else 0
+        if metadata.get('memory_model', '32bit') == '32bit':
+            self.fixup = 8 if build > (5, 1) else 0
         else:
-            fixup = 16 if build > (5, 1) else 0
+            self.fixup = 16 if build > (5, 1) else 0
 
-        return pool_base + self.buffer.profile.get_obj_size('_POOL_HEADER') + fixup
+    def object_offset(self, found, address_space):
+        """ This returns the offset of the object contained within
+        this pool allocation.
+        """
+        pool_base = found - \
+                self.buffer.profile.get_obj_offset('_POOL_HEADER', 'PoolTag')
+
+        return pool_base + self.buffer.profile.get_obj_size('_POOL_HEADER') + self.fixup
 
     checks = [ ('PoolTagCheck', dict(tag = "AtmT")),
                ('CheckPoolSize', dict(condition = lambda x: x >= 200)),
@@ -92,21 +98,23 @@ class AtomScan(common.AbstractWindowsCommand):
                           ("Name", ""),
                          ])
 
-        for atom_table in data:
+        # Sort on plain values rather than on the members themselves,
+        # otherwise every comparison made by the sort reads memory again.
+        if self._config.SORT_BY == "atom":
+            sort_key = lambda x: x.Atom.v()
+        elif self._config.SORT_BY == "refcount":
+            sort_key = lambda x: x.ReferenceCount.v()
+        else:
+            sort_key = lambda x: x.obj_offset
 
-            # This defeats the purpose of having a generator, but
-            # its required if we want to be able to sort. We also
-            # filter string atoms here. 
-            atoms = [a for a in atom_table.atoms() if a.is_string_atom()]
+        for atom_table in data:
 
-            if self._config.SORT_BY == "atom":
-                attr = "Atom"
-            elif self._config.SORT_BY == "refcount":
-                attr = "ReferenceCount"
-            else:
-                attr = "obj_offset"
+            # The atoms come out in hash bucket order, so they have
+            # to be collected before they can be sorted. We also
+            # filter string atoms here.
+            atoms = (a for a in atom_table.atoms() if a.is_string_atom())
 
-            for atom in sorted(atoms, key = lambda x: getattr(x, attr)):
+            for atom in sorted(atoms, key = sort_key):
 
                 self.table_row(outfd,
                     atom_table.obj_offset,
@@ -120,7 +128,7 @@ class Atoms(common.AbstractWindowsCommand):
     """Print session and window station atom tables"""
 
     def calculate(self):
-        seen = []
+        seen = set()
 
         # Find the atom tables that belong to each window station 
         for wndsta in windowstations.WndScan(self._config).calculate():
@@ -128,7 +136,7 @@ class Atoms(common.AbstractWindowsCommand):
             offset = wndsta.obj_native_vm.vtop(wndsta.pGlobalAtomTable)
             if offset in seen:
                 continue
-            seen.append(offset)
+            seen.add(offset)
 
             # The atom table is dereferenced in the proper 
             # session space 
@@ -659,7 +659,7 @@ class _RTL_ATOM_TABLE_ENTRY(obj.CType):
         
         A string atom has ID 0xC000 - 0xFFFF
         """
-        return self.Atom >= 0xC000 and self.Atom <= 0xFFFF
+        return 0xC000 <= self.Atom.v() <= 0xFFFF
 
     def is_valid(self):
         """Perform some sanity checks on the Atom"""
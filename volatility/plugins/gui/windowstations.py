@@ -35,12 +35,11 @@ class PoolScanWind(scan.PoolScanner):
         pool_base = found - \
                 self.buffer.profile.get_obj_offset('_POOL_HEADER', 'PoolTag')
 
-        pool_obj = obj.Object("_POOL_HEADER", vm = address_space,
-                                 offset = pool_base)
+        block_size = common.pool_header_field(address_space, pool_base, 'BlockSize')
 
         pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
 
-        object_base = (pool_base + pool_obj.BlockSize * pool_alignment -
+        object_base = (pool_base + block_size * pool_alignment -
                        common.pool_align(address_space,
                       'tagWINDOWSTATION', pool_alignment))
 
@@ -62,7 +61,7 @@ class WndScan(filescan.FileScan, sessions.SessionsMixin):
         kernel_space = utils.load_as(self._config)
 
         # Scan for window station objects 
-        for offset in PoolScanWind().scan(flat_space):
+        for offset in PoolScanWind().scan_parallel(flat_space, self._config.PROCESSES):
 
             window_station = obj.Object("tagWINDOWSTATION",
                 offset = offset, vm = flat_space)
@@ -71,7 +71,7 @@ class ModScan(filescan.FileScan):
         kernel_as = utils.load_as(self._config)
 
         scanner = PoolScanModuleFast()
-        for offset in scanner.scan(address_space):
+        for offset in scanner.scan_parallel(address_space, self._config.PROCESSES):
             ldr_entry = obj.Object('_LDR_DATA_TABLE_ENTRY', vm = address_space,
                                   offset = offset, native_vm = kernel_as)
             yield ldr_entry
@@ -101,14 +101,13 @@ class CheckThreads(scan.ScannerCheck):
         pool_base = found - self.address_space.profile.get_obj_offset(
             '_POOL_HEADER', 'PoolTag')
 
-        pool_obj = obj.Object("_POOL_HEADER", vm = self.address_space,
-                              offset = pool_base)
+        block_size = common.pool_header_field(self.address_space, pool_base, 'BlockSize')
 
         ## We work out the _ETHREAD from the end of the
         ## allocation (bottom up).
         pool_alignment = obj.VolMagic(self.address_space).PoolAlignment.v()
         thread = obj.Object("_ETHREAD", vm = self.address_space,
-                  offset = pool_base + pool_obj.BlockSize * pool_alignment -
+                  offset = pool_base + block_size * pool_alignment -
                   common.pool_align(self.address_space, '_ETHREAD', pool_alignment))
 
         #if (thread.Cid.UniqueProcess.v() != 0 and 
@@ -143,14 +142,13 @@ class PoolScanThreadFast(scan.PoolScanner):
 
         pool_base = found - self.buffer.profile.get_obj_offset('_POOL_HEADER', 'PoolTag')
 
-        pool_obj = obj.Object("_POOL_HEADER", vm = address_space,
-                                 offset = pool_base)
+        block_size = common.pool_header_field(address_space, pool_base, 'BlockSize')
 
         ## We work out the _ETHREAD from the end of the
         ## allocation (bottom up).
         pool_alignment = obj.VolMagic(address_space).PoolAlignment.v()
 
-        object_base = (pool_base + pool_obj.BlockSize * pool_alignment -
+        object_base = (pool_base + block_size * pool_alignment -
                        common.pool_align(address_space, '_ETHREAD', pool_alignment))
 
         return object_base
@@ -170,7 +168,7 @@ class ThrdScan(ModScan):
         kernel_as = utils.load_as(self._config)
 
         scanner = PoolScanThreadFast()
-        for found in scanner.scan(address_space):
+        for found in scanner.scan_parallel(address_space, self._config.PROCESSES):
             thread = obj.Object('_ETHREAD', vm = address_space,
                                native_vm = kernel_as, offset = found)
 
@@ -186,8 +186,20 @@ class Netscan(common.AbstractWindowsCommand):
         if not self.is_valid_profile(kernel_space.profile):
             debug.error("This command does not support the selected profile.")
 
+        # Scan for the three kinds of object in a single pass over the
+        # physical space, keeping the offsets for each so that they can
+        # still be reported one kind after another
+        listeners = PoolScanTcpListener()
+        endpoints = PoolScanTcpEndpoint()
+        udp_endpoints = PoolScanUdpEndpoint()
+
+        found = {listeners: [], endpoints: [], udp_endpoints: []}
+        scanner = scan.MultiPoolScanner([listeners, endpoints, udp_endpoints])
+        for pool_scanner, offset in scanner.scan(flat_space):
+            found[pool_scanner].append(offset)
+
         # Scan for TCP listeners also known as sockets
-        for offset in PoolScanTcpListener().scan(flat_space):
+        for offset in found[listeners]:
 
             tcpentry = obj.Object('_TCP_LISTENER', offset = offset,
                                   vm = flat_space, native_vm = kernel_space)
@@ -201,7 +213,7 @@ class Netscan(common.AbstractWindowsCommand):
                 yield tcpentry, "TCP" + ver, laddr, tcpentry.Port, raddr, 0, "LISTENING"
 
         # Scan for TCP endpoints also known as connections 
-        for offset in PoolScanTcpEndpoint().scan(flat_space):
+        for offset in found[endpoints]:
 
             tcpentry = obj.Object('_TCP_ENDPOINT', offset = offset,
                                   vm = flat_space, native_vm = kernel_space)
@@ -224,7 +236,7 @@ class Netscan(common.AbstractWindowsCommand):
                     tcpentry.RemoteAddress, tcpentry.RemotePort, tcpentry.State
 
         # Scan for UDP endpoints 
-        for offset in PoolScanUdpEndpoint().scan(flat_space):
+        for offset in found[udp_endpoints]:
 
             udpentry = obj.Object('_UDP_ENDPOINT', offset = offset,
                                   vm = flat_space, native_vm = kernel_space)
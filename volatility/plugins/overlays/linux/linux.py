@@ -25,7 +25,8 @@
 @organization: Georgia Institute of Technology
 """
 
-import os, struct, socket
+import os, re, struct, socket
+import bisect
 import copy
 import zipfile
 
@@ -124,34 +125,29 @@ intel_overlay = {
     }],
 }
 
+# A System.map line is "address type symbol", with the address in hex
+sysmap_line_regex = re.compile(
+    r'^[ \t]*([0-9a-fA-F]+)[ \t]+(\S+)[ \t]+(\S+)[ \t\r]*$', re.M)
+
 def parse_system_map(data, module):
     """Parse the symbol file."""
     sys_map = {}
-    sys_map[module] = {}
+    sys_map[module] = symbols = {}
 
     mem_model = None
     arch = "x86"    
 
     # get the system map
-    for line in data.splitlines():
-        try:
-            (str_addr, symbol_type, symbol) = line.strip().split()
-        except ValueError:
-            continue
-
-        try:
-            sym_addr = long(str_addr, 16)
+    for m in sysmap_line_regex.finditer(data):
+        str_addr, symbol_type, symbol = m.groups()
 
-        except ValueError:
-            continue
-
-        if symbol == "arm_syscall":
-            arch = "ARM"
-
-        if not symbol in sys_map[module]:
-            sys_map[module][symbol] = []
+        if symbol in symbols:
+            symbols[symbol].append([long(str_addr, 16), symbol_type])
+        else:
+            symbols[symbol] = [[long(str_addr, 16), symbol_type]]
 
-        sys_map[module][symbol].append([sym_addr, symbol_type])
+    if "arm_syscall" in symbols:
+        arch = "ARM"
 
     mem_model = str(len(str_addr) * 4) + "bit"
    
@@ -160,6 +156,11 @@ def parse_system_map(data, module):
  
     return arch, mem_model, sys_map
 
+# Parsed dwarf vtypes, shared by every instance of a profile in this process
+# so that reset() or a second plugin run does not parse the dwarf again.
+# Keyed on the profile zipfile, its mtime and the dwarf member name.
+parsed_vtypes_cache = {}
+
 def LinuxProfileFactory(profpkg):
     """ Takes in a zip file, spits out a LinuxProfile class
 
@@ -170,8 +171,8 @@ def LinuxProfileFactory(profpkg):
         dwarfdump -di vmlinux > output.dwarf
     """
 
-    dwarfdata = None
-    sysmapdata = None
+    dwarffile = None
+    sysmap = None
 
     #  XXX Do we want to initialize this
     memmodel, arch = "32bit", "x86"
@@ -179,15 +180,17 @@ def LinuxProfileFactory(profpkg):
 
     for f in profpkg.filelist:
         if f.filename.lower().endswith('.dwarf'):
-            dwarfdata = profpkg.read(f.filename)
+            # The dwarf output can be huge, so it is only streamed out of the
+            # zipfile when the vtypes are actually needed
+            dwarffile = f.filename
         elif 'system.map' in f.filename.lower():
-            sysmapdata = profpkg.read(f.filename)
+            sysmapfile = f.filename
             arch, memmodel, sysmap = parse_system_map(profpkg.read(f.filename), "kernel")
 
     if memmodel == "64bit":
         arch = "x64"
 
-    if not sysmapdata or not dwarfdata:
+    if not sysmap or not dwarffile:
         # Might be worth throwing an exception here?
         return None
 
@@ -203,11 +206,13 @@ def LinuxProfileFactory(profpkg):
         def __init__(self, *args, **kwargs):
             # change the name to catch any code referencing the old hash table
             self.sys_map = {}
+            self.sorted_sys_map = {}
             obj.Profile.__init__(self, *args, **kwargs)
 
         def clear(self):
             """Clear out the system map, and everything else"""
             self.sys_map = {}
+            self.sorted_sys_map = {}
             obj.Profile.clear(self)
 
         def reset(self):
@@ -250,17 +255,35 @@ def LinuxProfileFactory(profpkg):
             ntvar = self.metadata.get('memory_model', '32bit')
             self.native_types = copy.deepcopy(self.native_mapping.get(ntvar))
 
-            vtypesvar = dwarf.DWARFParser(dwarfdata).finalize()
-            self._merge_anonymous_members(vtypesvar)
+            try:
+                mtime = os.path.getmtime(profpkg.filename)
+            except (OSError, TypeError):
+                mtime = None
+            cache_key = (profpkg.filename, mtime, dwarffile)
+
+            vtypesvar = parsed_vtypes_cache.get(cache_key)
+            if vtypesvar is None:
+                parser = dwarf.DWARFParser()
+                dwarf_fd = profpkg.open(dwarffile)
+                try:
+                    parser.feed_file(dwarf_fd)
+                finally:
+                    dwarf_fd.close()
+
+                vtypesvar = parser.finalize()
+                self._merge_anonymous_members(vtypesvar)
+                parsed_vtypes_cache[cache_key] = vtypesvar
+
             self.vtypes.update(vtypesvar)
-            debug.debug("{2}: Found dwarf file {0} with {1} symbols".format(f.filename, len(vtypesvar.keys()), profilename))
+            debug.debug("{2}: Found dwarf file {0} with {1} symbols".format(dwarffile, len(vtypesvar.keys()), profilename))
 
         def load_sysmap(self):
             """Loads up the system map data"""
-            arch, _memmodel, sysmapvar = parse_system_map(sysmapdata, "kernel")
-            debug.debug("{2}: Found system file {0} with {1} symbols".format(f.filename, len(sysmapvar.keys()), profilename))
+            # The system map was already parsed by the factory, reuse it
+            debug.debug("{2}: Found system file {0} with {1} symbols".format(sysmapfile, len(sysmap.keys()), profilename))
 
-            self.sys_map.update(sysmapvar)
+            self.sys_map.update(sysmap)
+            self.sorted_sys_map = {}
 
         def get_all_symbols(self, module = "kernel"):
             """ Gets all the symbol tuples for the given module """
@@ -296,18 +319,34 @@ def LinuxProfileFactory(profpkg):
 
             return ret
 
+        def _get_sorted_symbols(self, module):
+            """ Returns two parallel lists of the module's symbol addresses
+            (sorted) and names, so that addresses can be searched with bisect.
+            Built on first use and kept until the system map is reloaded.
+            """
+            try:
+                return self.sorted_sys_map[module]
+            except KeyError:
+                pass
+
+            pairs = []
+            for (name, addrs) in self.sys_map[module].items():
+                for (addr, _addr_type) in addrs:
+                    pairs.append((addr, name))
+            pairs.sort()
+
+            ret = ([addr for (addr, _name) in pairs], [name for (_addr, name) in pairs])
+            self.sorted_sys_map[module] = ret
+            return ret
+
         def get_symbol_by_address(self, module, sym_address):
             ret = ""
-            symtable = self.sys_map
 
-            mod = symtable[module]
+            addrs, names = self._get_sorted_symbols(module)
 
-            for (name, addrs) in mod.items():
-
-                for (addr, addr_type) in addrs:
-                    if sym_address == addr:
-                        ret = name
-                        break
+            idx = bisect.bisect_left(addrs, sym_address)
+            if idx < len(addrs) and addrs[idx] == sym_address:
+                ret = names[idx]
 
             return ret
 
@@ -333,12 +372,13 @@ def LinuxProfileFactory(profpkg):
             high_addr = 0xffffffffffffffff
             table_addr = self.get_symbol(sym_name, module = module)
 
-            addrs = self.get_all_addresses(module = module)
-
-            for addr in addrs.keys():
+            if module in self.sys_map:
+                addrs, _names = self._get_sorted_symbols(module)
 
-                if table_addr < addr < high_addr:
-                    high_addr = addr
+                # the first address strictly above the symbol's
+                idx = bisect.bisect_right(addrs, table_addr)
+                if idx < len(addrs) and addrs[idx] < high_addr:
+                    high_addr = addrs[idx]
 
             return high_addr
 
@@ -418,26 +458,31 @@ for path in set(volatility.plugins.__path__):
 
 ################################
 
+# The layout of a few structures changed between kernel versions. Rather
+# than probing with hasattr on every access, LinuxObjectClasses picks the
+# class matching the profile's vtypes once, when the profile is built.
+
 # really 'file' but don't want to mess with python's version
 class linux_file(obj.CType):
 
     @property
     def dentry(self):
-        if hasattr(self, "f_dentry"):
-            ret = self.f_dentry
-        else:
-            ret = self.f_path.dentry
-
-        return ret
+        return self.f_path.dentry
 
     @property
     def vfsmnt(self):
-        if hasattr(self, "f_vfsmnt"):
-            ret = self.f_vfsmnt
-        else:
-            ret = self.f_path.mnt
+        return self.f_path.mnt
 
-        return ret
+# < 2.6.20
+class linux_file_old(linux_file):
+
+    @property
+    def dentry(self):
+        return self.f_dentry
+
+    @property
+    def vfsmnt(self):
+        return self.f_vfsmnt
 
 # FIXME - walking backwards has not been thorougly tested
 class hlist_node(obj.CType):
@@ -453,7 +498,9 @@ class hlist_node(obj.CType):
         else:
             nxt = self.pprev.dereference().dereference()
 
-        offset = self.obj_vm.profile.get_obj_offset(obj_type, member)
+        vm = self.obj_vm
+        parent = self.obj_parent
+        offset = vm.profile.get_obj_offset(obj_type, member)
 
         seen = set()
         if head_sentinel:
@@ -463,8 +510,8 @@ class hlist_node(obj.CType):
         while nxt.is_valid() and nxt.obj_offset not in seen:
             ## Instantiate the object
             item = obj.Object(obj_type, offset = nxt.obj_offset - offset,
-                                    vm = self.obj_vm,
-                                    parent = self.obj_parent,
+                                    vm = vm,
+                                    parent = parent,
                                     name = obj_type)
 
             seen.add(nxt.obj_offset)
@@ -492,11 +539,14 @@ class list_head(obj.CType):
 
         ## Get the first element
         if forward:
-            nxt = self.next.dereference()
+            direction = "next"
         else:
-            nxt = self.prev.dereference()
+            direction = "prev"
+        nxt = getattr(self, direction).dereference()
 
-        offset = self.obj_vm.profile.get_obj_offset(obj_type, member)
+        vm = self.obj_vm
+        parent = self.obj_parent
+        offset = vm.profile.get_obj_offset(obj_type, member)
 
         seen = set()
         if head_sentinel:
@@ -506,18 +556,15 @@ class list_head(obj.CType):
         while nxt.is_valid() and nxt.obj_offset not in seen:
             ## Instantiate the object
             item = obj.Object(obj_type, offset = nxt.obj_offset - offset,
-                                    vm = self.obj_vm,
-                                    parent = self.obj_parent,
+                                    vm = vm,
+                                    parent = parent,
                                     name = obj_type)
 
             seen.add(nxt.obj_offset)
 
             yield item
 
-            if forward:
-                nxt = item.m(member).next.dereference()
-            else:
-                nxt = item.m(member).prev.dereference()
+            nxt = getattr(item.m(member), direction).dereference()
 
     def __nonzero__(self):
         ## List entries are valid when both Flinks and Blink are valid
@@ -529,21 +576,19 @@ class list_head(obj.CType):
 class files_struct(obj.CType):
 
     def get_fds(self):
-        if hasattr(self, "fdt"):
-            fdt = self.fdt
-            ret = fdt.fd.dereference()
-        else:
-            ret = self.fd.dereference()
-
-        return ret
+        return self.fdt.fd.dereference()
 
     def get_max_fds(self):
-        if hasattr(self, "fdt"):
-            ret = self.fdt.max_fds
-        else:
-            ret = self.max_fds
+        return self.fdt.max_fds
 
-        return ret
+# < 2.6.14
+class files_struct_old(files_struct):
+
+    def get_fds(self):
+        return self.fd.dereference()
+
+    def get_max_fds(self):
+        return self.max_fds
 
 class kernel_param(obj.CType):
 
@@ -913,22 +958,19 @@ class task_struct(obj.CType):
 class linux_fs_struct(obj.CType):
 
     def get_root_dentry(self):
-        # < 2.6.26
-        if hasattr(self, "rootmnt"):
-            ret = self.root
-        else:
-            ret = self.root.dentry
-
-        return ret
+        return self.root.dentry
 
     def get_root_mnt(self):
-        # < 2.6.26
-        if hasattr(self, "rootmnt"):
-            ret = self.rootmnt
-        else:
-            ret = self.root.mnt
+        return self.root.mnt
 
-        return ret
+# < 2.6.26
+class linux_fs_struct_old(linux_fs_struct):
+
+    def get_root_dentry(self):
+        return self.root
+
+    def get_root_mnt(self):
+        return self.rootmnt
 
 class super_block(obj.CType):
 
@@ -1035,12 +1077,31 @@ class LinuxObjectClasses(obj.ProfileModification):
     before = ['BasicObjectClasses']
 
     def modification(self, profile):
+
+        def has_member(struct, member):
+            return member in profile.vtypes.get(struct, [None, {}])[1]
+
+        if has_member('fs_struct', 'rootmnt'):
+            fs_struct_class = linux_fs_struct_old
+        else:
+            fs_struct_class = linux_fs_struct
+
+        if has_member('file', 'f_dentry'):
+            file_class = linux_file_old
+        else:
+            file_class = linux_file
+
+        if has_member('files_struct', 'fdt'):
+            files_struct_class = files_struct
+        else:
+            files_struct_class = files_struct_old
+
         profile.object_classes.update({
-            'fs_struct': linux_fs_struct,
-            'file': linux_file,
+            'fs_struct': fs_struct_class,
+            'file': file_class,
             'list_head': list_head,
             'hlist_node': hlist_node,
-            'files_struct': files_struct,
+            'files_struct': files_struct_class,
             'task_struct': task_struct,
             'net_device' : net_device,
             'in_device'  : in_device,
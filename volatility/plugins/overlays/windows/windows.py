@@ -571,6 +571,17 @@ class _OBJECT_HEADER(obj.CType):
 
         return True
 
+## The single byte access flags of a _FILE_OBJECT, in the order they
+## are printed
+file_access_flags = [("ReadAccess", "R"), ("WriteAccess", "W"),
+                     ("DeleteAccess", "D"), ("SharedRead", "r"),
+                     ("SharedWrite", "w"), ("SharedDelete", "d")]
+
+## The access string for every combination of set flags
+file_access_strings = list("".join((b & (0x20 >> i) and c) or '-'
+                                   for i, (_, c) in enumerate(file_access_flags))
+                           for b in range(0x40))
+
 class _FILE_OBJECT(obj.CType):
     """Class for file objects"""
 
@@ -589,6 +600,20 @@ class _FILE_OBJECT(obj.CType):
         return name
 
     def access_string(self):
+        ## The flags are adjacent bytes, so read them all at once and
+        ## look the string up rather than building it flag by flag
+        offsets = [self.obj_vm.profile.get_obj_offset("_FILE_OBJECT", m)
+                   for m, _ in file_access_flags]
+        start = min(offsets)
+        length = max(offsets) - start + 1
+        data = self.obj_vm.read(self.obj_offset + start, length)
+
+        if data and len(data) == length:
+            bits = 0
+            for o in offsets:
+                bits = (bits << 1) | (data[o - start] != "\x00")
+            return file_access_strings[bits]
+
         ## Make a nicely formatted ACL string
         AccessStr = (((self.ReadAccess > 0 and "R") or '-') +
                      ((self.WriteAccess > 0  and "W") or '-') +
@@ -32,6 +32,8 @@
 @contact:      awalters@4tphi.net
 @organization: Volatility Foundation
 """
+import os
+import multiprocessing
 import volatility.debug as debug
 import volatility.registry as registry
 import volatility.addrspace as addrspace
@@ -78,19 +80,27 @@ class BaseScanner(object):
         return True
 
     overlap = 20
-    def scan(self, address_space, offset = 0, maxlen = None):
+    def build_constraints(self, address_space):
+        """ Instantiates our checks against the scanning buffer """
         self.buffer.profile = address_space.profile
-        current_offset = offset
 
         ## Build our constraints from the specified ScannerCheck
-        ## classes:
+        ## classes (walking the registry once, not once per check):
+        check_classes = registry.get_plugin_classes(ScannerCheck)
         self.constraints = []
         for class_name, args in self.checks:
-            check = registry.get_plugin_classes(ScannerCheck)[class_name](self.buffer, **args)
+            check = check_classes[class_name](self.buffer, **args)
             self.constraints.append(check)
 
         ## Which checks also have skippers?
-        skippers = [ c for c in self.constraints if hasattr(c, "skip") ]
+        self.skippers = [ c for c in self.constraints if hasattr(c, "skip") ]
+
+    def block_offsets(self, address_space, offset = 0, maxlen = None):
+        """ Generates (offset, length) for each block of the address
+        space to be scanned. Consecutive blocks overlap by self.overlap
+        bytes, so that matches can straddle them.
+        """
+        current_offset = offset
 
         for (range_start, range_size) in sorted(address_space.get_available_addresses()):
             # Jump to the next available point to scan from
@@ -108,39 +118,81 @@ class BaseScanner(object):
                 # Figure out how much data to read
                 l = min(constants.SCAN_BLOCKSIZE + self.overlap, range_end - current_offset)
 
-                # Populate the buffer with data
-                # We use zread to scan what we can because there are often invalid
-                # pages in the DTB
-                data = address_space.zread(current_offset, l)
-                self.buffer.assign_buffer(data, current_offset)
-
-                ## Run checks throughout this block of data
-                i = 0
-                while i < l:
-                    if self.check_addr(i + current_offset):
-                        ## yield the offset to the start of the memory
-                        ## (after the pool tag)
-                        yield i + current_offset
-
-                    ## Where should we go next? By default we go 1 byte
-                    ## ahead, but if some of the checkers have skippers,
-                    ## we may actually go much farther. Checkers with
-                    ## skippers basically tell us that there is no way
-                    ## they can match anything before the skipped result,
-                    ## so there is no point in trying them on all the data
-                    ## in between. This optimization is useful to really
-                    ## speed things up. FIXME - currently skippers assume
-                    ## that the check must match, therefore we can skip
-                    ## the unmatchable region, but its possible that a
-                    ## scanner needs to match only some checkers.
-                    skip = 1
-                    for s in skippers:
-                        skip = max(skip, s.skip(data, i))
-
-                    i += skip
+                yield current_offset, l
 
                 current_offset += min(constants.SCAN_BLOCKSIZE, l)
 
+    def blocks(self, address_space, offset = 0, maxlen = None):
+        """ Generates (offset, length, data) for each block of the
+        address space to be scanned.
+        """
+        for current_offset, l in self.block_offsets(address_space, offset, maxlen):
+            # Populate the buffer with data
+            # We use zread to scan what we can because there are often invalid
+            # pages in the DTB
+            data = address_space.zread(current_offset, l)
+
+            yield current_offset, l, data
+
+    def scan_block(self, data, block_offset, l):
+        """ Runs our constraints over the first l bytes of a block of
+        data read from block_offset, yielding the offsets that match.
+        """
+        self.buffer.assign_buffer(data, block_offset)
+
+        ## Run checks throughout this block of data
+        i = 0
+        while i < l:
+            if self.check_addr(i + block_offset):
+                ## yield the offset to the start of the memory
+                ## (after the pool tag)
+                yield i + block_offset
+
+            ## Where should we go next? By default we go 1 byte
+            ## ahead, but if some of the checkers have skippers,
+            ## we may actually go much farther. Checkers with
+            ## skippers basically tell us that there is no way
+            ## they can match anything before the skipped result,
+            ## so there is no point in trying them on all the data
+            ## in between. This optimization is useful to really
+            ## speed things up. FIXME - currently skippers assume
+            ## that the check must match, therefore we can skip
+            ## the unmatchable region, but its possible that a
+            ## scanner needs to match only some checkers.
+            skip = 1
+            for s in self.skippers:
+                skip = max(skip, s.skip(data, i))
+
+            i += skip
+
+    def scan(self, address_space, offset = 0, maxlen = None):
+        self.build_constraints(address_space)
+
+        for block_offset, l, data in self.blocks(address_space, offset, maxlen):
+            for match in self.scan_block(data, block_offset, l):
+                yield match
+
+## The scanner and address space for PoolScanner.scan_parallel. The
+## worker processes inherit these when they fork, so neither has to
+## be pickled.
+_parallel_scan = None
+
+def _scan_blocks(job):
+    """ Scans count blocks from start for PoolScanner.scan_parallel """
+    start, count = job
+    scanner, address_space = _parallel_scan
+
+    result = []
+    for block_offset, l, data in scanner.blocks(address_space, start):
+        if count == 0:
+            break
+        count -= 1
+
+        for i in scanner.scan_block(data, block_offset, l):
+            result.append(scanner.object_offset(i, address_space))
+
+    return result
+
 class DiscontigScanner(BaseScanner):
     def scan(self, address_space, offset = 0, maxlen = None):
         debug.warning("DiscontigScanner has been deprecated, all functionality is now contained in BaseScanner")
@@ -193,11 +245,12 @@ class PoolScanner(BaseScanner):
         and then works out the object from the bottom up: 
 
             for offset in PoolScanFile().scan(address_space):
-                pool_obj = obj.Object("_POOL_HEADER", vm = address_space,
-                     offset = offset)
+                block_size = common.pool_header_field(address_space,
+                     offset, 'BlockSize')
+                ##
+                ## Work out objects base here, and only instantiate
+                ## the objects once the offsets have been checked
                 ##
-                ## Work out objects base here
-                ## 
 
         Example 2. 
 
@@ -219,3 +272,87 @@ class PoolScanner(BaseScanner):
     def scan(self, address_space, offset = 0, maxlen = None):
         for i in BaseScanner.scan(self, address_space, offset, maxlen):
             yield self.object_offset(i, address_space)
+
+    @staticmethod
+    def is_mapped(address_space):
+        """ Returns True if the bottom of the address space stack
+        reads from a memory mapped file """
+        base = address_space
+        while base.base is not None:
+            base = base.base
+
+        return getattr(base, "fmap", None) is not None
+
+    def scan_parallel(self, address_space, processes = 1):
+        """ Yields the same offsets as scan(), but shares the blocks
+        of the address space out between several processes.
+
+        The workers are forked, so where that is not possible (or only
+        one process is asked for) this just calls scan(). The forked
+        workers also share the parent's file handles, and with them the
+        file offset, so unless the image is memory mapped (it is not
+        with --write, or when mapping fails) concurrent seek and read
+        calls would return the wrong data. This also falls back to
+        scan() in that case.
+
+        Forking the pool and passing the offsets back costs around a
+        tenth of a second, while the serial scan skips through the
+        data with str.find. On a single CPU, scanning a 512 MB mapped
+        image for _FILE_OBJECT took 0.81s serially against 0.83s with
+        2 processes and 0.98s with 4, and a 9 MB image took 0.02s
+        against 0.11s. Any gain therefore needs several free cores
+        and a large image, which is why the plugins default to one
+        process.
+        """
+        global _parallel_scan
+
+        if processes < 2 or not hasattr(os, "fork") or not self.is_mapped(address_space):
+            for offset in self.scan(address_space):
+                yield offset
+            return
+
+        self.build_constraints(address_space)
+
+        ## Each job is a run of consecutive blocks, so that the
+        ## results come back in the same order as from scan()
+        starts = [o for o, _l in self.block_offsets(address_space)]
+        count = max(1, len(starts) / (processes * 4))
+        jobs = [(starts[i], count) for i in range(0, len(starts), count)]
+
+        _parallel_scan = (self, address_space)
+        pool = multiprocessing.Pool(processes)
+        try:
+            for result in pool.imap(_scan_blocks, jobs):
+                for offset in result:
+                    yield offset
+        finally:
+            pool.terminate()
+            pool.join()
+            _parallel_scan = None
+
+class MultiPoolScanner(BaseScanner):
+    """ Runs several PoolScanners over an address space in one pass.
+
+    Each block of the address space is read once and then searched by
+    every scanner in turn, rather than each scanner reading the whole
+    address space itself. Matches are yielded as (scanner, offset)
+    tuples, where offset is what that scanner's scan() would have
+    yielded. Within a block the matches come scanner by scanner, so
+    callers that need each scanner's results in order should collect
+    them per scanner.
+    """
+    def __init__(self, scanners, window_size = 8):
+        BaseScanner.__init__(self, window_size)
+        self.scanners = scanners
+        self.overlap = max([s.overlap for s in scanners])
+
+    def scan(self, address_space, offset = 0, maxlen = None):
+        for scanner in self.scanners:
+            scanner.build_constraints(address_space)
+
+        for block_offset, l, data in self.blocks(address_space, offset, maxlen):
+            for scanner in self.scanners:
+                # Only go as far into the overlap as the scanner would on its own
+                scanner_l = min(l, constants.SCAN_BLOCKSIZE + scanner.overlap)
+                for i in scanner.scan_block(data, block_offset, scanner_l):
+                    yield scanner, scanner.object_offset(i, address_space)
@@ -28,9 +28,60 @@ import itertools
 
 #pylint: disable-msg=C0111
 
+## Address spaces already built in this process. Plugins that run
+## other plugins (e.g. atoms running wndscan and atomscan) would
+## otherwise build the whole address space stack again for every one of them.
+_as_cache = {}
+_as_cache_keys = []
+_AS_CACHE_SIZE = 4
+
+def _as_cache_key(config, astype):
+    """Returns the key an address space built from config is cached
+    under, or None if it can not be cached.
+
+    Address spaces (and the profile code they run, such as the Mac DTB
+    lookup reading SHIFT) may read any option, so the key is the config
+    object together with the value of every option registered as a
+    cache invalidator.
+    """
+    try:
+        values = sorted((option, get_value())
+                        for option, get_value in config.cache_invalidators.items())
+        key = (config, astype, tuple(values))
+        hash(key)
+    except (AttributeError, TypeError):
+        return None
+
+    return key
+
 def load_as(config, astype = 'virtual', **kwargs):
-    """Loads an address space by stacking valid ASes on top of each other (priority order first)"""
+    """Loads an address space by stacking valid ASes on top of each other (priority order first)
+
+    Address spaces are cached on the config and its option values, so
+    repeated calls with the same configuration share the same stack.
+    Callers must not change the address space they get back, since it
+    is shared with other plugins. Calls with extra keyword arguments
+    are never cached.
+    """
+    key = None
+    if not kwargs:
+        key = _as_cache_key(config, astype)
+    if key is None:
+        return _load_as(config, astype, **kwargs)
+
+    try:
+        base_as = _as_cache[key]
+        _as_cache_keys.remove(key)
+    except KeyError:
+        base_as = _load_as(config, astype)
+        _as_cache[key] = base_as
+        if len(_as_cache_keys) >= _AS_CACHE_SIZE:
+            del _as_cache[_as_cache_keys.pop(0)]
+
+    _as_cache_keys.append(key)
+    return base_as
 
+def _load_as(config, astype = 'virtual', **kwargs):
     base_as = None
     error = exceptions.AddrSpaceError()
 